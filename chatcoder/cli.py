@@ -22,6 +22,9 @@ from chatcoder.utils.console import (
     heading, show_welcome, confirm
 )
 
+# libyaml 可用时使用 C 实现的 SafeLoader
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 # ------------------------------
 # CLI 主入口
 # ------------------------------
@@ -95,6 +98,15 @@ def init(ctx):
     except Exception as e:
         error(f"Initialization failed: {e}")
 
+# ------------------------------
+# 辅助函数：读取 YAML 配置文件
+# ------------------------------
+
+def _load_yaml_file(path: Path) -> dict:
+    """读取 .chatcoder 下的 YAML 文件，空文件返回空字典"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=_YAML_LOADER) or {}
+
 # ------------------------------
 # 辅助函数：加载 Thinker 服务
 # ------------------------------
@@ -112,15 +124,13 @@ def _load_thinker_service() -> Thinker: # <-- 函数名更新
         raise click.Abort()
 
     try:
-        with open(config_file, 'r', encoding='utf-8') as f:
-            config_data = yaml.safe_load(f) or {}
+        config_data = _load_yaml_file(config_file)
     except Exception as e:
         error(f"Failed to read config.yaml: {e}")
         raise click.Abort()
 
     try:
-        with open(context_file, 'r', encoding='utf-8') as f:
-            context_data = yaml.safe_load(f) or {}
+        context_data = _load_yaml_file(context_file)
     except Exception as e:
         error(f"Failed to read context.yaml: {e}")
         raise click.Abort()
@@ -143,11 +153,9 @@ def show_context(ctx):
         config_data = {}
         context_data = {}
         if config_file.exists():
-             with open(config_file, 'r', encoding='utf-8') as f:
-                 config_data = yaml.safe_load(f) or {}
+             config_data = _load_yaml_file(config_file)
         if context_file.exists():
-             with open(context_file, 'r', encoding='utf-8') as f:
-                 context_data = yaml.safe_load(f) or {}
+             context_data = _load_yaml_file(context_file)
 
         # Display config.yaml content
         if config_data:
@@ -1,6 +1,7 @@
 # chatcoder/core/ai_manager.py
 import os
 import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, Optional
 from .models import ChangeSet
@@ -29,15 +30,31 @@ ALIASES = {
     'summary': 'workflows/step5-summary.md.j2',
 }
 
+@lru_cache(maxsize=None)
+def _shared_jinja_env(templates_dir: str) -> jinja2.Environment:
+    """
+    按模板目录共享 Jinja2 环境。
+    同一进程内多次创建 AIInteractionManager（每次 CLI 调用都会新建 Thinker）时，
+    复用已编译模板的缓存；FileSystemLoader 默认 auto_reload，模板修改后仍会重新加载。
+    """
+    loader = jinja2.FileSystemLoader(templates_dir)
+    return jinja2.Environment(loader=loader, autoescape=False, trim_blocks=True, lstrip_blocks=True)
+
+# parse_ai_response 使用的正则，模块加载时编译一次
+_CHANGES_SECTION_RE = re.compile(r"## Changes\s*(.*)", re.DOTALL | re.IGNORECASE)
+# 匹配 ### File: ... ```...``` Description: ...
+_FILE_BLOCK_RE = re.compile(
+    r"###\s*File:\s*(?P<file_path>\S+)\s*\n\s*```.*?\n(?P<content>.*?)\n\s*```\s*\n(?:Description:\s*(?P<description>.*?)\n)?",
+    re.DOTALL | re.IGNORECASE
+)
+
 class AIInteractionManager:
     def __init__(self):
         self.context_adapter = ContextManager()
         self.env = self._create_jinja_env()
 
     def _create_jinja_env(self) -> jinja2.Environment:
-        loader = jinja2.FileSystemLoader(str(TEMPLATES_DIR))
-        env = jinja2.Environment( loader=loader, autoescape=False, trim_blocks=True, lstrip_blocks=True)
-        return env
+        return _shared_jinja_env(str(TEMPLATES_DIR))
 
     def _resolve_template_path(self, template: str) -> str:
         if template in ALIASES:
@@ -102,7 +119,7 @@ class AIInteractionManager:
         """
         changes = []
         # 查找 "## Changes" 部分
-        changes_section_match = re.search(r"## Changes\s*(.*)", ai_response, re.DOTALL | re.IGNORECASE)
+        changes_section_match = _CHANGES_SECTION_RE.search(ai_response)
         if not changes_section_match:
             # warning("No '## Changes' section found in AI response.")
             # 尝试解析整个响应，或者返回 None
@@ -112,13 +129,7 @@ class AIInteractionManager:
         changes_text = changes_section_match.group(1)
 
         # 使用正则表达式查找各个文件块
-        # 匹配 ### File: ... ```...``` Description: ...
-        file_pattern = re.compile(
-            r"###\s*File:\s*(?P<file_path>\S+)\s*\n\s*```.*?\n(?P<content>.*?)\n\s*```\s*\n(?:Description:\s*(?P<description>.*?)\n)?",
-            re.DOTALL | re.IGNORECASE
-        )
-
-        for match in file_pattern.finditer(changes_text):
+        for match in _FILE_BLOCK_RE.finditer(changes_text):
             file_path = match.group("file_path").strip()
             content = match.group("content")
             description = (match.group("description") or "").strip()
@@ -126,7 +137,6 @@ class AIInteractionManager:
             if file_path and content is not None: # content 可能是空字符串
                  # 简单判断操作类型：如果文件已存在则 modify，否则 create
                  # 注意：这只是一个简化的逻辑，实际可能需要更复杂的判断或由 AI 明确指定
-                 import os
                  op = "modify" if os.path.exists(file_path) else "create"
                  
                  change: Change = {
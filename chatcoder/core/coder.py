@@ -53,6 +53,8 @@ class Coder:
             changes: List[Change] = change_set["changes"]
             applied_count = 0
             success_count = 0
+            # 已确保存在的父目录，同一目录下的多个文件只 mkdir 一次
+            ensured_dirs = set()
 
             # 2. 遍历并应用变更
             for i, change in enumerate(changes):
@@ -69,7 +71,10 @@ class Coder:
                     # 3. 根据操作类型处理文件
                     if op in ("create", "modify"):
                         # 确保父目录存在
-                        file_path.parent.mkdir(parents=True, exist_ok=True)
+                        parent_dir = file_path.parent
+                        if parent_dir not in ensured_dirs:
+                            parent_dir.mkdir(parents=True, exist_ok=True)
+                            ensured_dirs.add(parent_dir)
                         # 写入文件内容
                         file_path.write_text(new_content, encoding='utf-8')
                         success(f"    -> Successfully wrote to '{file_path}'.")
@@ -3,8 +3,10 @@
 项目类型探测器（仅 Python / C++）
 """
 
+import os
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Tuple
 from .utils import load_json_safely, read_file_safely
 
 # ==================== 探测规则 ====================
@@ -35,13 +37,25 @@ PROJECT_RULES = {
     ],
 }
 
+# fallback 阶段递归查找的 C++ 源文件后缀
+CPP_SOURCE_SUFFIXES = (".cpp", ".cc")
+
 # ==================== 核心 API ====================
 
 def detect_project_type(root: Path = Path(".")) -> str:
     """
     探测项目类型，返回如 'python-django', 'cpp', 'cpp-bazel'
     优先级：用户配置  > 框架  > 语言
+    结果按解析后的绝对路径缓存，项目文件变化后需调用 clear_project_type_cache()
     """
+    return _detect_project_type_cached(str(Path(root).resolve()))
+
+@lru_cache(maxsize=16)
+def _detect_project_type_cached(root_str: str) -> str:
+    root = Path(root_str)
+    # 一次 scandir 取得根目录下的文件名，规则匹配只做集合查找
+    file_names = _list_file_names(root)
+
     # 1. 尝试从配置加载（未来扩展）
     # config = _load_config(root)
     # if config and "project_type" in config:
@@ -49,24 +63,43 @@ def detect_project_type(root: Path = Path(".")) -> str:
 
     # 2. 框架/语言探测
     for project_type, rules in PROJECT_RULES.items():
-        if _matches_rules(root, rules):
+        if _matches_rules(root, file_names, rules):
             return project_type
 
     # 3. fallback
-    if (root / "main.py").exists():
+    if "main.py" in file_names:
         return "python"
-    if any(root.glob("**/*.cpp")) or any(root.glob("**/*.cc")):
+    if _contains_source_file(root, CPP_SOURCE_SUFFIXES):
         return "cpp"
     return "unknown"
 
+def clear_project_type_cache() -> None:
+    """清空 detect_project_type 的缓存，下次调用时重新探测"""
+    _detect_project_type_cached.cache_clear()
+
 # ==================== 私有实现 ====================
-def _matches_rules(root: Path, rules: List[Dict]) -> bool:
+def _list_file_names(root: Path) -> Set[str]:
+    """列出目录下（不递归）的文件名；目录不存在或不可读时返回空集合"""
+    try:
+        with os.scandir(root) as entries:
+            return {entry.name for entry in entries if entry.is_file()}
+    except OSError:
+        return set()
+
+def _contains_source_file(root: Path, suffixes: Tuple[str, ...]) -> bool:
+    """递归查找是否存在指定后缀的文件，找到第一个即返回"""
+    for _, _, files in os.walk(root):
+        if any(name.endswith(suffixes) for name in files):
+            return True
+    return False
+
+def _matches_rules(root: Path, file_names: Set[str], rules: List[Dict]) -> bool:
     """
     检查是否匹配规则组：所有 required 规则必须匹配，且至少一个规则匹配。
     """
     at_least_one_matched = False
     for rule in rules:
-        if _rule_matches(root, rule):
+        if _rule_matches(root, file_names, rule):
             at_least_one_matched = True # 标记至少有一个规则匹配
             # 注意：即使匹配了，也要继续检查所有 required 规则
         else:
@@ -79,18 +112,16 @@ def _matches_rules(root: Path, rules: List[Dict]) -> bool:
     # 2. at_least_one_matched 标记了是否有至少一个规则匹配
     return at_least_one_matched # 只有当至少一个规则匹配时才返回 True
 
-def _rule_matches(root: Path, rule: Dict) -> bool:
+def _rule_matches(root: Path, file_names: Set[str], rule: Dict) -> bool:
     """
     检查单个规则是否匹配
     """
-    file_path = root / rule["file"]
-    
-    if not file_path.exists():
+    if rule["file"] not in file_names:
         return False
 
     content_contains = rule.get("content_contains")
     if content_contains:
-        content = read_file_safely(file_path)
+        content = read_file_safely(root / rule["file"])
         if content is None or content_contains not in content:
             return False
 
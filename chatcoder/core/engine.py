@@ -25,6 +25,9 @@ except ImportError as e:
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 TEMPLATES_DIR = PROJECT_ROOT / "ai-prompts"
 
+# libyaml 可用时使用 C 实现的 SafeLoader
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 def get_workflow_path() -> Path:
     """获取工作流定义文件的目录路径"""
     return TEMPLATES_DIR / "workflows"
@@ -58,7 +61,7 @@ class WorkflowEngine:
         custom_path = self.get_workflow_path() / f"{name}.yaml"
         if custom_path.exists():
             content = custom_path.read_text(encoding="utf-8")
-            return yaml.safe_load(content)
+            return yaml.load(content, Loader=_YAML_LOADER)
         
         raise ValueError(f"Workflows schema not found: {name}. Looked in {custom_path}")
 
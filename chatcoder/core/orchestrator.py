@@ -1,15 +1,17 @@
 # chatcoder/core/orchestrator.py
 import re
-import uuid
-from datetime import datetime
+
+# 非字母数字、非空白的字符统一替换为空格（模块级预编译，避免每次调用查 re 缓存）
+_NON_WORD_CHARS_RE = re.compile(r"[^a-zA-Z0-9\s]")
 
 class TaskOrchestrator:
     def generate_feature_id(self, description: str) -> str:
-        cleaned = re.sub(r"[^a-zA-Z0-9\s]", " ", description.lower())
-        words = cleaned.split()
+        cleaned = _NON_WORD_CHARS_RE.sub(" ", description.lower())
+        # split 会在取到前 4 个词后停止继续切分剩余文本
+        words = cleaned.split(maxsplit=4)
         short_words = "_".join(words[:4])
         prefix = "feat"
         return f"{prefix}_{short_words}" if short_words else f"{prefix}_default"
-    
+
     def generate_automation_level(self) -> int:
         return 60
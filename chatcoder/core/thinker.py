@@ -4,8 +4,6 @@ from pathlib import Path
 from typing import Dict, Any, Optional, List
 from dataclasses import asdict
 
-from jinja2.runtime import Context
-
 # === 强依赖 ChatFlow v1.1.2 ===
 try:
     from chatflow.core.workflow_engine import WorkflowEngine
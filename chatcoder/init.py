@@ -21,6 +21,9 @@ TEMPLATE_DIR = Path(__file__).parent / "templates" / "ai-prompts"
 # CONTEXT_FILE = Path(".chatcoder") / "context.yaml"
 # CONFIG_FILE = Path(".chatcoder") / "config.yaml"
 
+# libyaml 可用时使用 C 实现的 SafeLoader
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 def load_template(template_type: str, lang: str) -> str:
     """加载指定类型的模板（config / context）"""
     template_path = TEMPLATE_DIR / template_type / f"{lang}.yaml"
@@ -98,7 +101,7 @@ def validate_config_content(content: str):
     """验证配置内容字符串的合法性"""
     click.echo(f"🔍 正在验证配置内容... ")
     try:
-        data = yaml.safe_load(content)
+        data = yaml.load(content, Loader=_YAML_LOADER)
     except Exception as e:
         click.echo(click.style("❌ YAML 语法错误！", fg="red"))
         click.echo(f"   {e}")
@@ -8,7 +8,6 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from enum import Enum
-import yaml
 
 class WorkflowStatus(Enum):
     CREATED = "created"
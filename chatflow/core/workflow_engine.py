@@ -2,6 +2,7 @@
 
 import threading
 import yaml
+from functools import lru_cache
 import uuid
 from pathlib import Path
 from typing import Dict, Any, Optional, List
@@ -16,6 +17,9 @@ from ..utils.id_generator import generate_id, generate_timestamp
 from ..utils.conditions import evaluate_condition
 from ..utils.risk_assessment import assess_risk
 
+# libyaml 可用时使用 C 实现的 SafeLoader
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 def get_workflow_path() -> Path:
     return Path.cwd() / "workflows"
 
@@ -25,6 +29,44 @@ def workflow_state_to_dict(state: WorkflowState) -> Dict[str, Any]:
         state_dict['status'] = state_dict['status'].value
     return state_dict
 
+@lru_cache(maxsize=128)
+def _parse_schema_file(schema_path: str, ino: int, mtime_ns: int, size: int) -> WorkflowSchema:
+    """
+    解析 Schema 文件为 WorkflowSchema。
+    以 (路径, inode, 修改时间, 大小) 为键在进程内缓存，多个引擎实例加载同一未修改文件时不再重复解析。
+    """
+    with open(schema_path, 'r') as f:
+        data = yaml.load(f, Loader=_YAML_LOADER)
+    
+    if 'phases' in data and data['phases'] and isinstance(data['phases'][0], dict):
+        def dict_to_phase_definition(phase_dict: Dict) -> PhaseDefinition:
+            if not isinstance(phase_dict, dict):
+                return phase_dict
+            phase_data = phase_dict.copy()
+            if 'task' not in phase_data:
+                phase_data['task'] = 'default_task' # 或者 'unknown_task'
+            condition_data = phase_data.get('condition')
+            if condition_data and isinstance(condition_data, dict):
+                def dict_to_condition_expression(cond_dict: Dict) -> ConditionExpression:
+                    if not isinstance(cond_dict, dict):
+                        return cond_dict
+                    operands_data = cond_dict.get('operands', [])
+                    converted_operands = []
+                    for op_data in operands_data:
+                        if isinstance(op_data, dict) and 'field' in op_data and 'operator' in op_data and 'value' in op_data:
+                            converted_operands.append(ConditionTerm(**op_data))
+                        elif isinstance(op_data, dict) and 'operator' in op_data:
+                            converted_operands.append(dict_to_condition_expression(op_data))
+                        else:
+                            converted_operands.append(op_data)
+                    return ConditionExpression(operator=cond_dict['operator'], operands=converted_operands)
+                phase_data['condition'] = dict_to_condition_expression(condition_data)
+            return PhaseDefinition(**phase_data)
+        
+        data['phases'] = [dict_to_phase_definition(p_dict) for p_dict in data['phases']]
+    
+    return WorkflowSchema(**data)
+
 class WorkflowEngine(IWorkflowEngine):
     def __init__(self, storage_dir: str = ".chatflow", state_store: IWorkflowStateStore = None):
         self.state_store = state_store or FileStateStore(storage_dir)
@@ -44,38 +86,8 @@ class WorkflowEngine(IWorkflowEngine):
         if not schema_path.exists():
             raise FileNotFoundError(f"Schema {schema_name} not found")
         
-        import yaml
-        with open(schema_path, 'r') as f:
-            data = yaml.safe_load(f)
-        
-        if 'phases' in data and data['phases'] and isinstance(data['phases'][0], dict):
-            def dict_to_phase_definition(phase_dict: Dict) -> PhaseDefinition:
-                if not isinstance(phase_dict, dict):
-                    return phase_dict
-                phase_data = phase_dict.copy()
-                if 'task' not in phase_data:
-                    phase_data['task'] = 'default_task' # 或者 'unknown_task'
-                condition_data = phase_data.get('condition')
-                if condition_data and isinstance(condition_data, dict):
-                    def dict_to_condition_expression(cond_dict: Dict) -> ConditionExpression:
-                        if not isinstance(cond_dict, dict):
-                            return cond_dict
-                        operands_data = cond_dict.get('operands', [])
-                        converted_operands = []
-                        for op_data in operands_data:
-                            if isinstance(op_data, dict) and 'field' in op_data and 'operator' in op_data and 'value' in op_data:
-                                converted_operands.append(ConditionTerm(**op_data))
-                            elif isinstance(op_data, dict) and 'operator' in op_data:
-                                converted_operands.append(dict_to_condition_expression(op_data))
-                            else:
-                                converted_operands.append(op_data)
-                        return ConditionExpression(operator=cond_dict['operator'], operands=converted_operands)
-                    phase_data['condition'] = dict_to_condition_expression(condition_data)
-                return PhaseDefinition(**phase_data)
-            
-            data['phases'] = [dict_to_phase_definition(p_dict) for p_dict in data['phases']]
-        
-        schema = WorkflowSchema(**data)
+        stat = schema_path.stat()
+        schema = _parse_schema_file(str(schema_path), stat.st_ino, stat.st_mtime_ns, stat.st_size)
         schema.validate()
         self._schema_cache[schema_key] = schema
         self._schema_cache[schema.name] = schema
@@ -5,11 +5,17 @@ ChatFlow 核心实现 - 文件状态存储 (FileWorkflowStateStore)
 """
 
 import json
+import os
+import secrets
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from .file_lock import FileLock
 from .state import IWorkflowStateStore
 from ..utils.checksum import calculate_checksum # 导入
+from ..utils.serialization import dumps_json_bytes, loads_json
+
+# 已结束的实例状态（WorkflowStatus.COMPLETED / FAILED 的取值），其余状态均视为活动
+_FINISHED_STATUSES = frozenset({"completed", "failed"})
 
 class FileStateStore(IWorkflowStateStore):
     def __init__(self, base_dir: str = ".chatflow"):
@@ -26,76 +32,100 @@ class FileStateStore(IWorkflowStateStore):
 
         self._feature_index = self._load_index("feature_index.json")
         self._instance_index = self._load_index("instance_index.json")
+        # 精简状态缓存：instance_id -> ((st_ino, st_mtime_ns, st_size), status_info)。
+        # 本进程写入时直接刷新；其他进程写入经 os.replace 产生新 inode，键随之变化
+        self._status_cache: Dict[str, Tuple[Tuple[int, int, int], Dict]] = {}
 
     def _load_index(self, filename: str) -> Dict:
-        index_file = self.indexes_dir / filename
-        if index_file.exists():
-            try:
-                return json.loads(index_file.read_text())
-            except:
-                pass
-        return {}
+        # 直接读取（EAFP）：不存在或损坏的索引都视为空索引
+        try:
+            return loads_json((self.indexes_dir / filename).read_bytes())
+        except (OSError, ValueError):
+            return {}
 
     def _persist_index(self):
         # 异步或定期保存
-        (self.indexes_dir / "feature_index.json").write_text(
-            json.dumps(self._feature_index, indent=2)
-        )
-        (self.indexes_dir / "instance_index.json").write_text(
-            json.dumps(self._instance_index, indent=2)
-        )
+        self._atomic_write_bytes(self.indexes_dir / "feature_index.json",
+                                 dumps_json_bytes(self._feature_index, indent=True))
+        self._atomic_write_bytes(self.indexes_dir / "instance_index.json",
+                                 dumps_json_bytes(self._instance_index, indent=True))
+
+    @staticmethod
+    def _atomic_write_bytes(path: Path, data: bytes):
+        """
+        先整块写入同目录下的临时文件，再 os.replace 原子替换目标文件：
+        读者要么看到旧内容，要么看到完整的新内容，不会读到写了一半的 JSON。
+        每次写入使用独立的临时文件名（进程号 + 随机串）：索引文件只受各实例自己的锁保护，
+        多个进程可能同时写同一个索引，共用一个临时文件名会互相覆盖/抢走对方的临时文件。
+        临时文件用普通 open 创建，权限与直接写目标文件一样遵循 umask。
+        不做 fsync（状态文件可由工作流重新生成，不值得为每次保存付出刷盘开销）。
+        """
+        temp_file = path.with_name(f"{path.name}.{os.getpid()}.{secrets.token_hex(4)}.tmp")
+        try:
+            with open(temp_file, "xb") as f:
+                f.write(data)
+            os.replace(temp_file, path)
+        except BaseException:
+            temp_file.unlink(missing_ok=True) # 出错则删除临时文件
+            raise
 
     def save_state(self, instance_id: str, state_data: Dict):
         with FileLock(str(self.locks_dir / f"{instance_id}.lock")):
-            # 1. 保存完整状态到子目录
-            instance_subdir = self.instances_dir / instance_id
-            instance_subdir.mkdir(exist_ok=True)
-
-            full_state_file = instance_subdir / "full_state.json"
-            temp_file = full_state_file.with_suffix(".json.tmp")
-            temp_file.write_text(json.dumps(state_data, indent=2), encoding="utf-8")
-            temp_file.rename(full_state_file)
-
-            # 2. 保存精简状态到主目录（用于快速查询）
-            status_info = {
-                "instance_id": state_data["instance_id"],
-                "status": state_data["status"],
-                "current_phase": state_data["current_phase"],
-                "feature_id": state_data["feature_id"],
-                "created_at": state_data["created_at"],
-                "updated_at": state_data["updated_at"],
-                "progress": self._calculate_progress(state_data),
-                "depth": state_data.get("recursion_depth", 0)
-            }
-            main_file = self.instances_dir / f"{instance_id}.json"
-            main_temp = main_file.with_suffix(".json.tmp")
-            main_temp.write_text(json.dumps(status_info, indent=2), encoding="utf-8")
-            main_temp.rename(main_file)
-
-            # 3. 保存/重写历史事件 (简单处理，可优化为增量)
-            history_file = instance_subdir / "history.ndjson"
-            temp_history_file = history_file.with_suffix(".ndjson.tmp")
-            try:
-                with open(temp_history_file, "w", encoding="utf-8") as f:
-                    for event in state_data.get("history", []):
-                        f.write(json.dumps(event) + "\n")
-                temp_history_file.replace(history_file) # 原子替换
-            except Exception as e:
-                temp_history_file.unlink(missing_ok=True) # 出错则删除临时文件
-                raise e
-
-            # 4. 更新索引
-            feature_id = state_data["feature_id"]
-            # 确保 instance_id 不重复添加到 feature_index
-            if instance_id not in self._feature_index.get(feature_id, []):
-                 self._feature_index.setdefault(feature_id, []).append(instance_id)
-            self._instance_index[instance_id] = {
-                "feature_id": feature_id,
-                "status": state_data["status"],
-                "updated_at": state_data["updated_at"]
-            }
+            self._write_state(instance_id, state_data)
             self._persist_index()  # 可优化为异步
 
+    def save_state_bulk(self, states: Dict[str, Dict]):
+        """
+        批量保存多个实例状态。
+        逐个实例加锁写入，索引文件只在最后持久化一次。
+        """
+        for instance_id, state_data in states.items():
+            with FileLock(str(self.locks_dir / f"{instance_id}.lock")):
+                self._write_state(instance_id, state_data)
+        if states:
+            self._persist_index()
+
+    def _write_state(self, instance_id: str, state_data: Dict):
+        """写入单个实例的状态文件并更新内存索引（调用方负责加锁和持久化索引）"""
+        # 1. 保存完整状态到子目录
+        instance_subdir = self.instances_dir / instance_id
+        instance_subdir.mkdir(exist_ok=True)
+
+        self._atomic_write_bytes(instance_subdir / "full_state.json",
+                                 dumps_json_bytes(state_data, indent=True))
+
+        # 2. 保存精简状态到主目录（用于快速查询）
+        status_info = {
+            "instance_id": state_data["instance_id"],
+            "status": state_data["status"],
+            "current_phase": state_data["current_phase"],
+            "feature_id": state_data["feature_id"],
+            "created_at": state_data["created_at"],
+            "updated_at": state_data["updated_at"],
+            "progress": self._calculate_progress(state_data),
+            "depth": state_data.get("recursion_depth", 0)
+        }
+        status_file = self.instances_dir / f"{instance_id}.json"
+        self._atomic_write_bytes(status_file, dumps_json_bytes(status_info, indent=True))
+        self._status_cache[instance_id] = (self._status_cache_key(status_file.stat()), status_info)
+
+        # 3. 保存/重写历史事件 (简单处理，可优化为增量)
+        self._atomic_write_bytes(
+            instance_subdir / "history.ndjson",
+            b"".join(dumps_json_bytes(event) + b"\n" for event in state_data.get("history", []))
+        )
+
+        # 4. 更新索引
+        feature_id = state_data["feature_id"]
+        # 确保 instance_id 不重复添加到 feature_index
+        if instance_id not in self._feature_index.get(feature_id, []):
+             self._feature_index.setdefault(feature_id, []).append(instance_id)
+        self._instance_index[instance_id] = {
+            "feature_id": feature_id,
+            "status": state_data["status"],
+            "updated_at": state_data["updated_at"]
+        }
+
     def _calculate_progress(self, state_data: Dict) -> float:
         # 计算已完成的阶段数
         # 兼容两种标记方式：
@@ -124,46 +154,63 @@ class FileStateStore(IWorkflowStateStore):
     def load_state(self, instance_id: str) -> Optional[Dict]:
         full_state_file = self.instances_dir / instance_id / "full_state.json"
         with FileLock(str(self.locks_dir / f"{instance_id}.lock")):
-            if full_state_file.exists():
-                try:
-                    content = full_state_file.read_text(encoding="utf-8")
-                    return json.loads(content)
-                except (IOError, json.JSONDecodeError) as e:
-                    print(f"Error loading state for {instance_id}: {e}")
+            # 直接读取，不先 exists()：命中和未命中都只需一次 open
+            try:
+                return loads_json(full_state_file.read_bytes())
+            except FileNotFoundError:
+                pass
+            except (IOError, json.JSONDecodeError) as e:
+                print(f"Error loading state for {instance_id}: {e}")
         return None
 
+    @staticmethod
+    def _status_cache_key(st: os.stat_result) -> Tuple[int, int, int]:
+        """
+        精简状态缓存的有效性键。
+        含 st_ino：粗粒度时间戳的文件系统上，同大小的重写仅凭 mtime/size 区分不出来。
+        """
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
     def get_workflow_status_info(self, instance_id: str) -> Optional[Dict]:
-        """获取精简状态（推荐用于UI）"""
+        """
+        获取精简状态（推荐用于UI）。
+        按 (inode, mtime_ns, size) 缓存解析结果，文件未变化时只需一次 stat；返回副本，调用方可自由修改。
+        """
         status_file = self.instances_dir / f"{instance_id}.json"
-        if status_file.exists():
+        try:
+            st = status_file.stat()
+        except OSError:
+            return None
+        key = self._status_cache_key(st)
+        cached = self._status_cache.get(instance_id)
+        if cached is None or cached[0] != key:
             try:
-                content = status_file.read_text(encoding="utf-8")
-                return json.loads(content)
-            except():
-                pass
-        return None
+                cached = (key, loads_json(status_file.read_bytes()))
+            except (OSError, ValueError): # orjson/json 的 JSONDecodeError 都是 ValueError
+                return None
+            self._status_cache[instance_id] = cached
+        return dict(cached[1])
 
     def get_workflow_history(self, instance_id: str) -> List[Dict]:
         """获取完整历史事件流"""
         history_file = self.instances_dir / instance_id / "history.ndjson"
-        events = []
-        if history_file.exists():
-            try:
-                for line in history_file.open(encoding="utf-8"):
-                    if line.strip():
-                        events.append(json.loads(line))
-            except():
-                pass
-        return events
+        try:
+            with open(history_file, "rb") as f:
+                return [loads_json(line) for line in f if line.strip()]
+        except (OSError, ValueError):
+            return []
 
 
     def list_all_state_files(self) -> List[Path]:
         """
         (FileWorkflowStateStore 特有) 列出基目录下所有状态文件的路径。
         """
-        if not self.base_dir.exists():
+        # 一次 scandir 读取目录，只按名称过滤（与原先 glob("*.json") 的匹配结果一致）
+        try:
+            with os.scandir(self.base_dir) as entries:
+                return [Path(entry.path) for entry in entries if entry.name.endswith(".json")]
+        except FileNotFoundError:
             return []
-        return list(self.base_dir.glob("*.json"))
 
     def list_instances_by_feature(self, feature_id: str) -> List[str]:
         # 使用内存中的 _feature_index
@@ -215,7 +262,7 @@ class FileStateStore(IWorkflowStateStore):
 
         # 保存元数据
         record_file = tasks_dir / f"{base_name}.json"
-        record_file.write_text(json.dumps(task_record_data, indent=2))
+        self._atomic_write_bytes(record_file, dumps_json_bytes(task_record_data, indent=True))
         # 保存文本产物
         prompt_file = phase_artifacts_dir / f"{base_name}.prompt.md"
         response_file = phase_artifacts_dir / f"{base_name}.ai_response.md"
@@ -223,9 +270,18 @@ class FileStateStore(IWorkflowStateStore):
         response_file.write_text(ai_response_content)
 
     def get_current_task_id_for_feature(self, feature_id: str) -> Optional[str]:
-        """根据 feature_id 获取当前活动（非完成）任务的 instance_id。"""
-        # TODO: 实现此方法逻辑
-        pass
+        """
+        根据 feature_id 获取当前活动（非完成）任务的 instance_id。
+        状态取自内存中的 feature/instance 索引，不解析各实例的状态文件；
+        但索引可能残留已被删除的实例（如 Thinker.delete_feature 直接删除文件），
+        因此候选实例的精简状态文件必须仍然存在。
+        """
+        for instance_id in self._feature_index.get(feature_id, []):
+            info = self._instance_index.get(instance_id)
+            if (info and info.get("status") not in _FINISHED_STATUSES
+                    and (self.instances_dir / f"{instance_id}.json").exists()):
+                return instance_id
+        return None
 
     def list_features(self) -> List[str]:
         """获取所有已知的 feature_id 列表。"""
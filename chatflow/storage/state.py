@@ -12,6 +12,11 @@ class IWorkflowStateStore(ABC):
     def save_state(self, instance_id: str, state_data: Dict[str, Any]) -> None:
         pass
 
+    def save_state_bulk(self, states: Dict[str, Dict[str, Any]]) -> None:
+        """批量保存实例状态。默认逐个调用 save_state，具体实现可覆盖以减少 I/O。"""
+        for instance_id, state_data in states.items():
+            self.save_state(instance_id, state_data)
+
     @abstractmethod
     def load_state(self, instance_id: str) -> Optional[Dict[str, Any]]:
         pass
@@ -1,12 +1,11 @@
 # chatflow/utils/id_generator.py
-import uuid
+import secrets
 import time
 
 def generate_id() -> str:
-    """生成短唯一ID"""
-    return uuid.uuid4().hex[:12]
+    """生成短唯一ID（12 位十六进制，直接取 6 个随机字节，不必生成完整 UUID 再截断）"""
+    return secrets.token_hex(6)
 
 def generate_timestamp() -> float:
     """获取时间戳"""
     return time.time()
-
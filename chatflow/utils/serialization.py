@@ -0,0 +1,29 @@
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def dumps_json_bytes(data: Any, indent: bool = False) -> bytes:
+    """序列化为 UTF-8 编码的 JSON 字节串，写文件时可省去 str 的解码/编码"""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    return json.dumps(data, indent=2 if indent else None).encode("utf-8")
+
+
+def loads_json(content: Union[str, bytes]) -> Any:
+    """
+    解析 JSON 字符串或 UTF-8 字节串（读文件时直接传 read_bytes() 的结果即可）；
+    orjson.JSONDecodeError 是 json.JSONDecodeError 的子类
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(content)
+    return json.loads(content)
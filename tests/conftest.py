@@ -0,0 +1,197 @@
+# tests/conftest.py
+"""
+测试共享 fixture。
+"""
+import os
+import shutil
+from pathlib import Path
+from unittest.mock import create_autospec
+
+import pytest
+from click.testing import CliRunner
+
+# 必须在导入 tests.helpers 之前注册，helpers 中的 assert 才会被重写
+pytest.register_assert_rewrite("tests.helpers")
+
+from tests.helpers import StubProvider  # noqa: E402
+
+# CLI 测试使用的最小配置，直接以 YAML 字节写盘（测试期间不再运行 YAML emitter）
+CLI_CONFIG_YAML = b"test_config: value1\ncore_patterns:\n- src/*.py\n"
+CLI_CONTEXT_YAML = b"project_name: MyProject\ncustom_key: custom_value\n"
+
+# feature 相关命令测试使用的实例数据（feature_id -> instances）
+FEATURE_INSTANCES = {
+    "feat_1": [{"instance_id": "wfi_1"}],
+    "feat_2": [{"instance_id": "wfi_2a"}, {"instance_id": "wfi_2b"}],
+    "feat_test": [
+        {
+            "instance_id": "wfi_abc123",
+            "status": "running",
+            "current_phase": "analyze",
+            "progress": 0.5,
+            "updated_at": 1700000000.0
+        },
+        {
+            "instance_id": "wfi_def456",
+            "status": "completed",
+            "current_phase": "implement",
+            "progress": 1.0,
+            "updated_at": 1700000100.0
+        }
+    ],
+}
+
+
+@pytest.fixture
+def make_provider():
+    """
+    StubProvider 工厂。
+
+    用法: make_provider("OKProvider", priority=50, provide_result=[...])
+    """
+    return StubProvider
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _plain_console():
+    """
+    测试期间让全局 rich console 输出纯文本：
+    关闭颜色与终端探测，并固定宽度，避免表格按环境宽度折行。
+    """
+    from chatcoder.utils.console import console
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(console, "no_color", True)
+        mp.setattr(console, "_force_terminal", False)
+        mp.setattr(console, "width", 200)
+        yield console
+
+
+@pytest.fixture(scope="session")
+def cli_app():
+    """CLI 入口（chatcoder.cli 只在首次请求时导入一次）"""
+    from chatcoder.cli import cli
+    return cli
+
+
+@pytest.fixture(scope="session")
+def runner():
+    """
+    整个测试会话共享的 CliRunner（无状态）。
+    Click 8.2+ 始终分开捕获 stdout/stderr（mix_stderr 参数已移除），
+    成功路径直接断言 result.stdout_bytes。
+    """
+    return CliRunner()
+
+
+@pytest.fixture(scope="session")
+def _chatcoder_template(tmp_path_factory):
+    """整个会话只生成一次的 .chatcoder 模板目录（config.yaml + context.yaml）"""
+    template = tmp_path_factory.mktemp("tpl") / ".chatcoder"
+    template.mkdir()
+    (template / "config.yaml").write_bytes(CLI_CONFIG_YAML)
+    (template / "context.yaml").write_bytes(CLI_CONTEXT_YAML)
+    return template
+
+
+@pytest.fixture
+def chatcoder_project_dir(tmp_path, monkeypatch, _chatcoder_template):
+    """
+    切换到临时项目目录，并从会话模板复制 .chatcoder/config.yaml 与 context.yaml。
+    返回项目根目录。
+    """
+    monkeypatch.chdir(tmp_path)
+    shutil.copytree(_chatcoder_template, tmp_path / ".chatcoder")
+    return tmp_path
+
+
+@pytest.fixture
+def fake_project_dir(fs):
+    """
+    pyfakefs 内存文件系统中的空项目目录（只有空的 .chatcoder/，没有配置文件）。
+    用于 init、配置缺失等不关心磁盘产物的测试。
+    """
+    project = Path("/project")
+    fs.create_dir(project / ".chatcoder")
+    os.chdir(project)
+    return project
+
+
+@pytest.fixture(scope="session")
+def ai_response_file(tmp_path_factory):
+    """apply 类测试共用的 AI 响应文件（只读，整个会话创建一次）"""
+    path = tmp_path_factory.mktemp("ai") / "resp.txt"
+    path.write_text("AI generated content for new_file.py", encoding="utf-8")
+    return path
+
+
+@pytest.fixture(scope="session")
+def _thinker_cls_template():
+    """
+    整个会话只构建一次的 Thinker 类 mock。
+    使用 autospec：实例 mock 只暴露 Thinker 真实存在的方法，并校验调用签名。
+    """
+    from chatcoder.cli import Thinker
+    return create_autospec(Thinker)
+
+
+@pytest.fixture(scope="session")
+def _coder_cls_template():
+    """整个会话只构建一次的 Coder 类 mock（autospec）"""
+    from chatcoder.cli import Coder
+    return create_autospec(Coder)
+
+
+@pytest.fixture(scope="module")
+def _thinker_cls_patch(module_mocker, _thinker_cls_template):
+    """每个测试模块只替换一次 chatcoder.cli 中的 Thinker 类"""
+    return module_mocker.patch("chatcoder.cli.Thinker", new=_thinker_cls_template)
+
+
+@pytest.fixture(scope="module")
+def _coder_cls_patch(module_mocker, _coder_cls_template):
+    """每个测试模块只替换一次 chatcoder.cli 中的 Coder 类"""
+    return module_mocker.patch("chatcoder.cli.Coder", new=_coder_cls_template)
+
+
+def _reset_cls_mock(mock_cls):
+    """清空调用记录以及测试中配置的返回值/side_effect，保留 autospec 结构"""
+    mock_cls.reset_mock(side_effect=True)
+    mock_cls.return_value.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture
+def mock_thinker_cls(_thinker_cls_patch):
+    """模块级 Thinker mock，每个测试结束后复位"""
+    yield _thinker_cls_patch
+    _reset_cls_mock(_thinker_cls_patch)
+
+
+@pytest.fixture
+def mock_thinker(mock_thinker_cls):
+    """CLI 实例化得到的 Thinker mock，测试只需配置用到的返回值"""
+    return mock_thinker_cls.return_value
+
+
+@pytest.fixture
+def mock_coder_cls(_coder_cls_patch):
+    """模块级 Coder mock，每个测试结束后复位"""
+    yield _coder_cls_patch
+    _reset_cls_mock(_coder_cls_patch)
+
+
+@pytest.fixture
+def mock_coder(mock_coder_cls):
+    """CLI 实例化得到的 Coder mock"""
+    return mock_coder_cls.return_value
+
+
+@pytest.fixture
+def thinker_with_features(mock_thinker):
+    """
+    预先配置好 feature 查询/删除返回值的 Thinker mock，
+    供 feature list/status/delete 测试共用。
+    """
+    mock_thinker.list_all_features.return_value = ["feat_1", "feat_2"]
+    mock_thinker.get_feature_instances.side_effect = FEATURE_INSTANCES.__getitem__
+    mock_thinker.delete_feature.return_value = True
+    return mock_thinker
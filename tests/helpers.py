@@ -0,0 +1,40 @@
+# tests/helpers.py
+"""
+测试辅助对象（桩实现、工厂等）。
+
+非 fixture 的共享测试代码放在此模块；conftest.py 已通过
+pytest.register_assert_rewrite 为本模块启用断言重写。
+"""
+from chatcontext.core.provider import IContextProvider
+
+
+class StubProvider(IContextProvider):
+    """
+    IContextProvider 的轻量桩实现。
+    以普通列表记录 can_provide / provide 收到的请求，代替 MagicMock 的调用追踪。
+    """
+
+    def __init__(self, name, priority=50, can_provide=True, provide_result=None, raise_exc=None):
+        self._name = name
+        self._priority = priority
+        self._can_provide = can_provide
+        self._provide_result = provide_result
+        self._raise_exc = raise_exc
+        self.calls = {"can_provide": [], "provide": []}
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def get_priority(self, request) -> int:
+        return self._priority
+
+    def can_provide(self, request) -> bool:
+        self.calls["can_provide"].append(request)
+        return self._can_provide
+
+    def provide(self, request):
+        self.calls["provide"].append(request)
+        if self._raise_exc is not None:
+            raise self._raise_exc
+        return self._provide_result or []
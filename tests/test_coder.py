@@ -1,100 +1,93 @@
 # tests/test_coder.py
 import unittest
-from unittest.mock import patch, MagicMock, mock_open, call, ANY
+from unittest.mock import patch, MagicMock, call
 from pathlib import Path
-import tempfile
-import shutil
+from types import MappingProxyType
 
 # Adjust import path as needed
 from chatcoder.core.coder import Coder
 # Assume ChangeSet is defined or mocked appropriately
-from chatcoder.core.models import ChangeSet, Change
+from chatcoder.core.models import ChangeSet
+
+# Parsed change sets shared by the tests (read-only; Coder never mutates them)
+CHANGE_SET_CREATE_MODIFY = MappingProxyType({
+    "changes": [
+        {"file_path": "src/new_file.py", "operation": "create", "new_content": "print('Hello')", "description": "New file"},
+        {"file_path": "README.md", "operation": "modify", "new_content": "# Updated Readme", "description": "Update readme"}
+    ],
+    "source_task_id": "some_task"
+})
+CHANGE_SET_MIXED = MappingProxyType({
+    "changes": [
+        {"file_path": "src/good_file.py", "operation": "create", "new_content": "good", "description": "Good"},
+        {"file_path": "src/bad_file.py", "operation": "create", "new_content": "bad", "description": "Bad"}
+         # test_apply_task_success_mixed_operations makes writing bad_file.py fail
+    ],
+    "source_task_id": "some_task"
+})
+CHANGE_SET_EMPTY = MappingProxyType({"changes": [], "source_task_id": None})
+
 
 class TestCoder(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        """Build the mock Thinker tree once for the whole class."""
+        cls.mock_thinker = MagicMock()
+        cls.mock_ai_manager = MagicMock()
+        cls.mock_thinker.ai_manager = cls.mock_ai_manager
+
     def setUp(self):
         """Set up test fixtures before each test method."""
-        self.test_dir = tempfile.mkdtemp()
-
-        # Create a mock Thinker instance
-        self.mock_thinker = MagicMock()
-        self.mock_ai_manager = MagicMock()
-        self.mock_thinker.ai_manager = self.mock_ai_manager
+        # Clear calls and configured return values left by the previous test
+        self.mock_ai_manager.reset_mock(return_value=True, side_effect=True)
 
         # Create Coder instance with the mock Thinker
         self.coder = Coder(thinker=self.mock_thinker)
 
-    def tearDown(self):
-        """Tear down test fixtures after each test method."""
-        shutil.rmtree(self.test_dir, ignore_errors=True)
-
-    def test_apply_task_success_create_modify(self):
+    @patch.object(Path, 'mkdir', autospec=True)
+    @patch.object(Path, 'write_text', autospec=True)
+    def test_apply_task_success_create_modify(self, mock_write, mock_mkdir):
         """Test successful application of create/modify changes."""
         instance_id = "wfi_test123"
         ai_response = "Sample AI response"
 
         # Mock the AI manager's parse response
-        mock_change_set: ChangeSet = {
-            "changes": [
-                {"file_path": "src/new_file.py", "operation": "create", "new_content": "print('Hello')", "description": "New file"},
-                {"file_path": "README.md", "operation": "modify", "new_content": "# Updated Readme", "description": "Update readme"}
-            ],
-            "source_task_id": "some_task"
-        }
+        mock_change_set: ChangeSet = CHANGE_SET_CREATE_MODIFY
         self.mock_ai_manager.parse_ai_response.return_value = mock_change_set
 
         result = self.coder.apply_task(instance_id, ai_response)
 
         self.mock_ai_manager.parse_ai_response.assert_called_once_with(ai_response)
-
-        # Check if files were written correctly
-        # Since we're not patching Path.write_text globally, we check calls on the mock instances
-        # This test assumes Path() is used directly in Coder.apply_task
-        # A more robust test would patch Path and its methods
-
-        # However, we can check that the Coder attempted to process the changes
         self.assertTrue(result) # Should return True on success
 
-        # Check calls to Path operations indirectly via mocks if possible,
-        # or use patch.object(Path, 'write_text') etc. for more granular control.
-        # For simplicity here, we rely on the logic flow and return value assertion.
+        # Path.write_text / Path.mkdir are patched, so nothing touches the real filesystem
+        mock_write.assert_has_calls([
+            call(Path("src/new_file.py"), "print('Hello')", encoding='utf-8'),
+            call(Path("README.md"), "# Updated Readme", encoding='utf-8'),
+        ])
+        self.assertEqual(mock_write.call_count, 2)
+        self.assertEqual(mock_mkdir.call_count, 2) # Parent directory ensured for each change
 
 
-    def test_apply_task_success_mixed_operations(self):
+    @patch.object(Path, 'mkdir', autospec=True)
+    @patch.object(Path, 'write_text', autospec=True)
+    def test_apply_task_success_mixed_operations(self, mock_write, mock_mkdir):
         """Test applying changes with mixed success/failure."""
         instance_id = "wfi_test123"
         ai_response = "Sample AI response"
 
-        # Simulate one successful write, one failing write (e.g., permission error)
-        # This requires mocking Path operations, which is complex.
-        # Let's test the logic flow assuming parse succeeds.
-        mock_change_set: ChangeSet = {
-            "changes": [
-                {"file_path": "src/good_file.py", "operation": "create", "new_content": "good", "description": "Good"},
-                {"file_path": "src/bad_file.py", "operation": "create", "new_content": "bad", "description": "Bad"}
-                 # Assume writing bad_file.py raises an exception in the implementation
-            ],
-            "source_task_id": "some_task"
-        }
+        # Simulate one successful write, one failing write (permission error)
+        mock_change_set: ChangeSet = CHANGE_SET_MIXED
         self.mock_ai_manager.parse_ai_response.return_value = mock_change_set
-
-        # We cannot easily mock Path().write_text to raise for one call and not another without complex patching.
-        # Let's assume the overall logic handles partial success.
-        # A real test would patch `Path().parent.mkdir` and `Path().write_text` appropriately.
-        # For now, assert that it attempts to process and returns based on logic (e.g., if any succeed, might be True)
-
-        # Let's simplify: if parse succeeds and there are changes, it tries to apply, returns True-ish based on internal logic
-        # (implementation dependent). Let's focus on the interaction.
+        mock_write.side_effect = [None, PermissionError("bad_file")]
 
         result = self.coder.apply_task(instance_id, ai_response)
 
         self.mock_ai_manager.parse_ai_response.assert_called_once_with(ai_response)
-        # Asserting exact file operations is tricky without deeper mocking of Path.
-        # The key is that it interacts with the parsed changes.
-        self.assertIn("changes", mock_change_set) # Implicitly checked by passing to function
-        # Assert result based on implementation assumption (that it tries)
-        # A better test would mock Path ops; this checks interaction.
-        self.assertIsNotNone(result) # Should not be None if it tried
+        self.assertEqual(mock_write.call_count, 2) # Both writes attempted
+        mock_mkdir.assert_called_once_with(Path("src"), parents=True, exist_ok=True) # Shared parent created once
+        self.assertTrue(result) # Partial success still counts as applied
 
 
     def test_apply_task_no_changes(self):
@@ -102,7 +95,7 @@ class TestCoder(unittest.TestCase):
         instance_id = "wfi_test123"
         ai_response = "AI response with no actionable changes"
 
-        self.mock_ai_manager.parse_ai_response.return_value = {"changes": [], "source_task_id": None}
+        self.mock_ai_manager.parse_ai_response.return_value = CHANGE_SET_EMPTY
         # OR return None
         # self.mock_ai_manager.parse_ai_response.return_value = None
 
@@ -0,0 +1,54 @@
+# tests/test_detector.py
+import pytest
+
+from chatcoder.core import detector
+from chatcoder.core.detector import clear_project_type_cache, detect_project_type
+
+
+@pytest.fixture(autouse=True)
+def _clear_project_type_cache():
+    """detect_project_type 按目录缓存结果，本模块每个测试前后清空"""
+    clear_project_type_cache()
+    yield
+    clear_project_type_cache()
+
+
+def test_detect_project_type_python(tmp_path):
+    """带 pyproject.toml 的目录识别为 python 项目"""
+    (tmp_path / "pyproject.toml").touch()
+
+    assert detect_project_type(tmp_path) == "python"
+
+
+def test_detect_project_type_scans_once_per_root(tmp_path, monkeypatch):
+    """同一目录重复探测只扫描一次"""
+    calls = []
+    list_file_names = detector._list_file_names
+
+    def counting_list_file_names(root):
+        calls.append(root)
+        return list_file_names(root)
+
+    monkeypatch.setattr(detector, "_list_file_names", counting_list_file_names)
+    (tmp_path / "pyproject.toml").touch()
+
+    assert detect_project_type(tmp_path) == "python"
+    assert detect_project_type(tmp_path) == "python"
+    assert len(calls) == 1
+
+
+def test_clear_project_type_cache_redetects(tmp_path):
+    """项目文件变化后，clear_project_type_cache() 使下次调用重新探测"""
+    assert detect_project_type(tmp_path) == "unknown"
+
+    (tmp_path / "CMakeLists.txt").touch()
+    clear_project_type_cache()
+    assert detect_project_type(tmp_path) == "cpp"
+
+
+def test_detect_project_type_nested_cpp_sources(tmp_path):
+    """没有标记文件时，递归查找 C++ 源文件"""
+    (tmp_path / "src" / "core").mkdir(parents=True)
+    (tmp_path / "src" / "core" / "engine.cc").touch()
+
+    assert detect_project_type(tmp_path) == "cpp"
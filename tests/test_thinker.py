@@ -1,7 +1,8 @@
 # tests/test_thinker.py
 import unittest
-from unittest.mock import patch, MagicMock, call, ANY
+from unittest.mock import patch, Mock, MagicMock, call
 from pathlib import Path
+from types import SimpleNamespace
 import tempfile
 import shutil
 from datetime import datetime
@@ -9,6 +10,10 @@ from datetime import datetime
 # Adjust import path as needed for your project structure
 # 假设 chatcoder 是一个包，位于项目根目录或 PYTHONPATH 中
 from chatcoder.core.thinker import Thinker
+from chatcoder.core.ai_manager import AIInteractionManager
+from chatcoder.core.orchestrator import TaskOrchestrator
+from chatflow.core.workflow_engine import WorkflowEngine
+from chatflow.storage.file_state_store import FileStateStore
 
 class TestThinker(unittest.TestCase):
 
@@ -25,19 +30,23 @@ class TestThinker(unittest.TestCase):
         # Patch WorkflowEngine to isolate Thinker logic
         self.workflow_engine_patcher = patch('chatcoder.core.thinker.WorkflowEngine')
         self.mock_workflow_engine_class = self.workflow_engine_patcher.start()
-        self.mock_workflow_engine = MagicMock()
+        # Plain Mocks limited to the real APIs: cheaper than MagicMock, and a misspelt or
+        # removed method fails instead of silently returning a child mock.
+        # state_store is an instance attribute (set in __init__), so it is attached explicitly.
+        self.mock_workflow_engine = Mock(spec=WorkflowEngine)
+        self.mock_workflow_engine.state_store = Mock(spec=FileStateStore)
         self.mock_workflow_engine_class.return_value = self.mock_workflow_engine
 
         # Patch AIInteractionManager
         self.ai_manager_patcher = patch('chatcoder.core.thinker.AIInteractionManager')
         self.mock_ai_manager_class = self.ai_manager_patcher.start()
-        self.mock_ai_manager = MagicMock()
+        self.mock_ai_manager = Mock(spec_set=AIInteractionManager)
         self.mock_ai_manager_class.return_value = self.mock_ai_manager
 
         # Patch TaskOrchestrator
         self.task_orchestrator_patcher = patch('chatcoder.core.thinker.TaskOrchestrator')
         self.mock_task_orchestrator_class = self.task_orchestrator_patcher.start()
-        self.mock_task_orchestrator = MagicMock()
+        self.mock_task_orchestrator = Mock(spec_set=TaskOrchestrator)
         self.mock_task_orchestrator_class.return_value = self.mock_task_orchestrator
 
     def tearDown(self):
@@ -72,10 +81,11 @@ class TestThinker(unittest.TestCase):
     # --- start_new_feature Tests ---
     def test_start_new_feature_success(self):
         """Test successful feature start."""
-        mock_start_result = MagicMock()
-        mock_start_result.instance_id = "wfi_test123"
-        mock_start_result.initial_phase = "analyze"
-        mock_start_result.created_at = datetime.now().timestamp()
+        mock_start_result = SimpleNamespace(
+            instance_id="wfi_test123",
+            initial_phase="analyze",
+            created_at=datetime.now().timestamp(),
+        )
         self.mock_workflow_engine.start_workflow_instance.return_value = mock_start_result
 
         self.mock_task_orchestrator.generate_feature_id.return_value = "feat_test_feature"
@@ -1,9 +1,7 @@
 # tests/test_workflow_engine.py
 import os
+import shutil
 import tempfile
-import threading
-import time
-from datetime import datetime
 import json
 import hashlib
 import yaml
@@ -13,7 +11,8 @@ from unittest.mock import patch
 # --- 导入 --- 
 # 确保导入了正确的类和函数
 from chatflow.core.workflow_engine import WorkflowEngine
-from chatflow.core.models import *
+from chatflow.core.models import WorkflowStatus, WorkflowStartResult
+from chatflow.storage.file_state_store import FileStateStore
 # --- ---
 
 @pytest.fixture
@@ -23,8 +22,8 @@ def temp_storage_dir():
         yield tmpdir
 
 # --- Schema Fixtures ---
-# 这些 fixture 定义了测试用的 Schema 数据
-@pytest.fixture
+# 这些 fixture 定义了测试用的 Schema 数据（只读，整个模块共用一份）
+@pytest.fixture(scope="module")
 def sample_schema_dict():
     """提供示例 Schema 字典"""
     return {
@@ -37,7 +36,7 @@ def sample_schema_dict():
         ]
     }
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def conditional_schema_dict():
     """提供带条件分支的 Schema"""
     return {
@@ -68,7 +67,7 @@ def conditional_schema_dict():
         ]
     }
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def fallback_skip_schema_dict():
     """提供测试 fallback_phase 和阶段跳过的 Schema"""
     return {
@@ -107,26 +106,27 @@ def fallback_skip_schema_dict():
 
 
 # --- Engine Fixture ---
+@pytest.fixture(scope="module")
+def _schema_template(tmp_path_factory, sample_schema_dict, conditional_schema_dict, fallback_skip_schema_dict):
+    """整个模块只序列化一次的 Schema YAML 目录，各测试复制到自己的存储目录"""
+    template = tmp_path_factory.mktemp("schemas")
+    for schema_dict in [sample_schema_dict, conditional_schema_dict, fallback_skip_schema_dict]:
+        (template / f"{schema_dict['name']}.yaml").write_text(yaml.dump(schema_dict))
+    return template
+
+
 # 这个 fixture 负责创建 WorkflowEngine 实例，并预置所需的 Schema 文件
 @pytest.fixture
-def engine(temp_storage_dir, sample_schema_dict, conditional_schema_dict, fallback_skip_schema_dict):
+def engine(temp_storage_dir, _schema_template):
     """创建测试用引擎实例，并预置 Schema 文件"""
-    # 1. 创建引擎实例
+    # 1. 创建引擎实例（每个测试独立的存储目录和内存索引）
     engine = WorkflowEngine(storage_dir=temp_storage_dir)
-    
-    # 2. 获取引擎的 schemas 目录
-    schemas_dir = engine.state_store.schemas_dir
-    os.makedirs(schemas_dir, exist_ok=True) # 确保目录存在
 
-    # 3. 将 fixture 提供的 schema 字典写入到引擎会查找的 YAML 文件中
+    # 2. 复制预先生成的 Schema 文件到引擎会查找的 schemas 目录
     #    这样 engine._load_schema_from_file 就能找到它们
-    for schema_dict in [sample_schema_dict, conditional_schema_dict, fallback_skip_schema_dict]:
-        if schema_dict and 'name' in schema_dict:
-            schema_path = schemas_dir / f"{schema_dict['name']}.yaml"
-            with open(schema_path, 'w') as f:
-                yaml.dump(schema_dict, f)
-                
-    # 4. 返回配置好的引擎实例
+    shutil.copytree(_schema_template, engine.state_store.schemas_dir, dirs_exist_ok=True)
+
+    # 3. 返回配置好的引擎实例
     return engine
 # --- ---
 
@@ -156,6 +156,30 @@ class TestWorkflowEngineBasics:
         assert os.path.exists(os.path.join(temp_storage_dir, ".locks"))
         assert os.path.exists(os.path.join(temp_storage_dir, ".indexes"))
 
+    def test_schema_parse_shared_across_engines(self, engine, sample_schema_dict):
+        """测试同一未修改的 Schema 文件在多个引擎实例间只解析一次"""
+        other = WorkflowEngine(storage_dir=str(engine.state_store.base_dir))
+        schema1 = engine._load_schema_from_file(sample_schema_dict['name'])
+        schema2 = other._load_schema_from_file(sample_schema_dict['name'])
+        assert schema1 is schema2
+
+    def test_schema_replaced_with_same_size_and_mtime(self, engine, sample_schema_dict):
+        """测试 Schema 文件被同大小、同 mtime 的新文件替换后重新解析"""
+        name = sample_schema_dict['name']
+        schema_file = engine.state_store.schemas_dir / f"{name}.yaml"
+        assert engine._load_schema_from_file(name).version == "1.0"
+
+        old_stat = schema_file.stat()
+        replacement = schema_file.with_suffix(".tmp")
+        replacement.write_text(schema_file.read_text().replace("'1.0'", "'2.0'"))
+        os.replace(replacement, schema_file)
+        # 模拟粗粒度时间戳：mtime 与原文件相同
+        os.utime(schema_file, ns=(old_stat.st_atime_ns, old_stat.st_mtime_ns))
+        assert schema_file.stat().st_size == old_stat.st_size
+
+        other = WorkflowEngine(storage_dir=str(engine.state_store.base_dir))
+        assert other._load_schema_from_file(name).version == "2.0"
+
 
 class TestWorkflowEngineStart:
     """测试工作流启动"""
@@ -429,7 +453,8 @@ class TestWorkflowEngineStateManagement:
         
         # 修改文件内容（模拟其他进程修改）
         full_state_file = os.path.join(engine.state_store.instances_dir, result.instance_id, "full_state.json")
-        original_content = json.load(open(full_state_file))
+        with open(full_state_file, 'rb') as f:
+            original_content = json.load(f)
         original_status = original_content["status"] # 例如 "created "
         
         # 直接修改文件
@@ -562,6 +587,164 @@ class TestWorkflowEngineStateManagement:
         assert agg_status["completed_count"] == 0
         assert agg_status["status"] == "in_progress"
 
+    def test_save_state_bulk(self, engine):
+        """测试批量保存状态：索引只持久化一次，且与逐个保存结果一致"""
+        store = engine.state_store
+        states = {
+            f"wfi_bulk_{i}": {
+                "instance_id": f"wfi_bulk_{i}",
+                "feature_id": "feat_bulk",
+                "status": "created",
+                "current_phase": "phase1",
+                "created_at": 1.0,
+                "updated_at": 1.0,
+                "history": [],
+            }
+            for i in range(3)
+        }
+
+        with patch.object(store, "_persist_index", wraps=store._persist_index) as persist:
+            store.save_state_bulk(states)
+        persist.assert_called_once()
+
+        assert store.list_instances_by_feature("feat_bulk") == list(states)
+        for instance_id, state_data in states.items():
+            assert store.load_state(instance_id) == state_data
+            assert store.get_workflow_status_info(instance_id)["feature_id"] == "feat_bulk"
+
+    def test_get_current_task_id_for_feature(self, engine):
+        """测试通过索引查找 feature 的活动实例"""
+        store = engine.state_store
+        base = {"feature_id": "feat_active", "current_phase": "phase1",
+                "created_at": 1.0, "updated_at": 1.0, "history": []}
+        store.save_state_bulk({
+            "wfi_done": {**base, "instance_id": "wfi_done", "status": "completed"},
+            "wfi_failed": {**base, "instance_id": "wfi_failed", "status": "failed"},
+            "wfi_run": {**base, "instance_id": "wfi_run", "status": "running"},
+            "wfi_new": {**base, "instance_id": "wfi_new", "feature_id": "feat_new", "status": "created"},
+        })
+
+        assert store.get_current_task_id_for_feature("feat_active") == "wfi_run"
+        # 刚启动（created）的实例同样是活动实例
+        assert store.get_current_task_id_for_feature("feat_new") == "wfi_new"
+        assert store.get_current_task_id_for_feature("feat_missing") is None
+
+    def test_get_current_task_id_after_instance_deleted(self, engine):
+        """测试实例文件被删除（索引未清理）后，不再把它当作活动实例"""
+        store = engine.state_store
+        store.save_state("wfi_1", {"instance_id": "wfi_1", "feature_id": "feat_del", "status": "created",
+                                   "current_phase": "phase1", "created_at": 1.0, "updated_at": 1.0, "history": []})
+        # 与 Thinker.delete_feature 相同：只删除实例文件和目录
+        (store.instances_dir / "wfi_1.json").unlink()
+        shutil.rmtree(store.instances_dir / "wfi_1")
+
+        fresh_store = FileStateStore(str(store.base_dir))
+        assert fresh_store.load_state("wfi_1") is None
+        assert fresh_store.get_current_task_id_for_feature("feat_del") is None
+
+    def test_status_info_cache_invalidated_on_save(self, engine):
+        """测试精简状态缓存：文件未变化时复用，重新保存后读到新状态"""
+        store = engine.state_store
+        state = {"instance_id": "wfi_cached", "feature_id": "feat_cache", "status": "running",
+                 "current_phase": "phase1", "created_at": 1.0, "updated_at": 1.0, "history": []}
+        store.save_state("wfi_cached", state)
+
+        first = store.get_workflow_status_info("wfi_cached")
+        first["status"] = "mutated"
+        assert store.get_workflow_status_info("wfi_cached")["status"] == "running"
+
+        store.save_state("wfi_cached", {**state, "status": "completed", "current_phase": "phase2"})
+        info = store.get_workflow_status_info("wfi_cached")
+        assert info["status"] == "completed"
+        assert info["current_phase"] == "phase2"
+        assert store.get_workflow_status_info("wfi_missing") is None
+
+    def test_status_info_cache_same_size_rewrite(self, engine):
+        """测试同大小重写（created -> running，时间戳不变）后立即读到新状态"""
+        store = engine.state_store
+        state = {"instance_id": "wfi_same", "feature_id": "feat_same", "status": "created",
+                 "current_phase": "phase1", "created_at": 1.0, "updated_at": 1.0, "history": []}
+        store.save_state("wfi_same", state)
+        assert store.get_workflow_status_info("wfi_same")["status"] == "created"
+
+        status_file = store.instances_dir / "wfi_same.json"
+        old_stat = status_file.stat()
+        store.save_state("wfi_same", {**state, "status": "running"})
+        # 模拟粗粒度时间戳：mtime 与上次写入相同
+        os.utime(status_file, ns=(old_stat.st_atime_ns, old_stat.st_mtime_ns))
+        assert status_file.stat().st_size == old_stat.st_size
+        assert store.get_workflow_status_info("wfi_same")["status"] == "running"
+
+    def test_saved_files_follow_umask(self, engine):
+        """测试原子写入的文件权限与普通写入一致（遵循 umask），且不留下临时文件"""
+        store = engine.state_store
+        state = {"instance_id": "wfi_mode", "feature_id": "feat_mode", "status": "created",
+                 "current_phase": "phase1", "created_at": 1.0, "updated_at": 1.0, "history": [{"event_type": "x"}]}
+        store.save_state("wfi_mode", state)
+
+        reference = store.base_dir / "reference.txt"
+        reference.write_bytes(b"")
+        expected_mode = reference.stat().st_mode & 0o777
+        for path in [store.instances_dir / "wfi_mode.json",
+                     store.instances_dir / "wfi_mode" / "full_state.json",
+                     store.instances_dir / "wfi_mode" / "history.ndjson",
+                     store.indexes_dir / "feature_index.json",
+                     store.indexes_dir / "instance_index.json"]:
+            assert path.stat().st_mode & 0o777 == expected_mode, path
+        assert not list(store.base_dir.rglob("*.tmp"))
+
+    def test_missing_instance_reads(self, engine):
+        """测试读取不存在的实例：返回 None / 空历史，而不是抛错"""
+        store = engine.state_store
+        assert store.load_state("wfi_none") is None
+        assert store.get_workflow_history("wfi_none") == []
+
+    def test_list_all_state_files(self, engine):
+        """测试列出基目录下名称以 .json 结尾的条目（与 glob("*.json") 结果一致）"""
+        store = engine.state_store
+        (store.base_dir / "a.json").write_text("{}")
+        (store.base_dir / "b.txt").write_text("")
+        (store.base_dir / ".hidden.json").write_text("{}")
+
+        assert sorted(store.list_all_state_files()) == sorted(store.base_dir.glob("*.json"))
+        assert store.base_dir / "a.json" in store.list_all_state_files()
+        assert store.base_dir / "b.txt" not in store.list_all_state_files()
+
+
+class TestStdlibJsonFallback:
+    """未安装 orjson 时（运行时依赖中没有 orjson），存储层退回标准库 json 的完整路径"""
+
+    @pytest.fixture(autouse=True)
+    def _without_orjson(self, monkeypatch):
+        monkeypatch.setattr("chatflow.utils.serialization.ORJSON_AVAILABLE", False)
+        # 任何残留的 orjson 调用都会直接报错
+        monkeypatch.setattr("chatflow.utils.serialization.orjson", None)
+
+    def test_save_load_status_history(self, engine, sample_schema_dict):
+        """测试 json 回退路径下的保存、加载、精简状态与历史"""
+        result = engine.start_workflow_instance(
+            schema_name=sample_schema_dict['name'],
+            initial_context={"k": "v"},
+            feature_id="feat_fallback"
+        )
+        engine.trigger_next_step(result.instance_id, trigger_data={"step1": "done"})
+
+        # 新的存储实例：从磁盘重新读取，而不是引擎内缓存
+        store = FileStateStore(str(engine.state_store.base_dir))
+        state = store.load_state(result.instance_id)
+        assert state["instance_id"] == result.instance_id
+        assert state["current_phase"] == "phase2"
+        assert state["variables"]["k"] == "v"
+
+        status_info = store.get_workflow_status_info(result.instance_id)
+        assert status_info["current_phase"] == "phase2"
+        assert status_info["feature_id"] == "feat_fallback"
+
+        event_types = [e["event_type"] for e in store.get_workflow_history(result.instance_id)]
+        assert "workflow_started" in event_types
+        assert "phase_started" in event_types
+        assert store.list_instances_by_feature("feat_fallback") == [result.instance_id]
+
 
 # --- 新增：测试产物管理 ---
 class TestArtifactsManagement:
@@ -603,11 +786,7 @@ class TestArtifactsManagement:
         prompt_file = artifacts_dir / f"{base_name}.prompt.md"
         response_file = artifacts_dir / f"{base_name}.ai_response.md"
         
-        assert record_file.exists()
-        assert prompt_file.exists()
-        assert response_file.exists()
-        
-        # 验证内容
+        # 验证内容（文件不存在时读取直接抛错，无需单独检查 exists()）
         assert prompt_file.read_text() == prompt_content
         assert response_file.read_text() == ai_response_content
         
@@ -615,7 +794,7 @@ class TestArtifactsManagement:
         expected_prompt_checksum = hashlib.sha256(prompt_content.encode('utf-8')).hexdigest()
         expected_response_checksum = hashlib.sha256(ai_response_content.encode('utf-8')).hexdigest()
         
-        record_data = json.loads(record_file.read_text())
+        record_data = json.loads(record_file.read_bytes())
         assert record_data["prompt_checksum"] == expected_prompt_checksum
         assert record_data["response_checksum"] == expected_response_checksum
 # --- ---